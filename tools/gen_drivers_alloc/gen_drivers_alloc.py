@@ -6,16 +6,24 @@ driver allocation based on a YAML configuration file. It uses templates to
 produce consistent code for peripheral initialization and interrupt handling.
 """
 
-import os.path
+import functools
+import io
+import re
 import sys
 from datetime import datetime
 from pathlib import Path
 
 import yaml
 
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
+
 C_TEMPLATE_FILE = "c_file.template"
 H_TEMPLATE_FILE = "h_file.template"
 MARKER = "@@marker:"
+MARKER_REGEX = re.compile(re.escape(MARKER) + r"(\w+)")
 FILENAME_MARKER = "filename"
 DATE_MARKER = "date"
 AUTHOR_MARKER = "author"
@@ -31,6 +39,7 @@ DRIVER_ALLOC_TABLE_NAME = "K_DRIVERS_ALLOC"
 USART_DRIVER_NAME = "USART"
 GPIO_DRIVER_NAME = "GPIO"
 
+BUFFER_NAME_PREFIX = "G_"
 BUFFER_NAME_SUFFIX = "_BUFFER"
 BUFFER_SIZE_SUFFIX = "_BUFFER_SIZE"
 
@@ -41,40 +50,79 @@ def extract_marker(text):
 
     This function processes the input text, identifies words that contain a specific
     marker (defined as `MARKER`), and extracts the associated values. If no markers
-    are found, it returns None.
+    are found, it returns None. Text without any marker is rejected with a plain
+    substring test before running the regular expression.
 
     :param text: The input string where markers will be searched.
     :type text: str
     :return: A list of marker values if found, otherwise None.
     :rtype: list[str] | None
     """
-    split_text = text.split()
-    markers_indexes = [i for i, e in enumerate(split_text) if MARKER in e]
-    if len(markers_indexes) == 0:
+    if MARKER not in text:
         return None
-    else:
-        markers_list = []
-        for index in markers_indexes:
-            markers_list.append(split_text[index].split(":")[1])
-        return markers_list
+    return MARKER_REGEX.findall(text) or None
+
+
+@functools.lru_cache(maxsize=8)
+def parse_template(template: str):
+    """
+    Loads and tokenizes a template file.
+
+    Each line of the template containing markers, stripped of its line ending, is
+    paired with these markers, so the template is only read and scanned once,
+    whatever the number of files generated from it. Consecutive lines without
+    marker are merged into a single block, so they are written at once. A template
+    without any marker is returned as a single block, without being split into
+    lines.
+
+    :param template: Path to the template file.
+    :type template: str
+    :return: Tuple of (text, markers) pairs, where markers is a tuple of marker
+        values, or None if the text is a block of lines without marker.
+    :rtype: tuple[tuple[str, tuple[str, ...] | None], ...]
+    """
+    raw = Path(template).read_text()
+
+    # Fast path: nothing to replace, the template is copied as is
+    if MARKER not in raw:
+        return ((raw.removesuffix("\n"), None),) if raw else ()
+
+    # Split on newlines only, like readlines(), and drop the empty element
+    # following the final newline
+    template_lines = raw.split("\n")
+    if template_lines[-1] == "":
+        template_lines.pop()
+
+    parsed_lines = []
+    text_block = []
+    for line in template_lines:
+        # Cheap rejection of plain text lines before looking for markers
+        markers = extract_marker(line) if "@@" in line else None
+        if markers is None:
+            text_block.append(line)
+        else:
+            if text_block:
+                parsed_lines.append(("\n".join(text_block), None))
+                text_block = []
+            parsed_lines.append((line, tuple(markers)))
+    if text_block:
+        parsed_lines.append(("\n".join(text_block), None))
+    return tuple(parsed_lines)
 
 
 def gen_includes(inc_list):
     """
     Generates C-style include directives from a list of include file names.
 
-    This function takes a list of include file names and creates a list of
-    strings representing C-style include directives.
+    This function takes a list of include file names and creates the
+    C-style include directives, one per line.
 
     :param inc_list: List of include file names.
     :type inc_list: list[str]
-    :return: List of C-style include directive strings.
-    :rtype: list[str]
+    :return: C-style include directives, separated by newlines.
+    :rtype: str
     """
-    c_code = []
-    for inc in inc_list:
-        c_code.append(f'#include "{inc}"')
-    return c_code
+    return "\n".join([f'#include "{inc}"' for inc in inc_list])
 
 
 def gen_defines(defines: list):
@@ -82,18 +130,15 @@ def gen_defines(defines: list):
     Generate C preprocessor #define directives from a list of definitions.
 
     This function takes a list of pairs, where each pair contains a name and
-    value for a macro definition. It creates a list of strings where each string
-    represents a C preprocessor #define directive.
+    value for a macro definition. It creates the C preprocessor #define
+    directives, one per line.
 
     :param defines: A list of tuples, where each tuple contains two elements:
                     the name (str) of the macro and its value (str).
-    :return: A list of strings. Each string corresponds to a generated #define
-             directive in C syntax.
+    :return: The generated #define directives in C syntax, separated by newlines.
+    :rtype: str
     """
-    c_code = []
-    for define in defines:
-        c_code.append(f"#define {define[0]} {define[1]}")
-    return c_code
+    return "\n".join([f"#define {define[0]} {define[1]}" for define in defines])
 
 
 def gen_struct_init(
@@ -104,7 +149,7 @@ def gen_struct_init(
 
     This function generates the initialization code for a C struct, given its type,
     name, fields, and an optional `const` qualifier. The generated code is returned
-    as a list of strings, where each string represents a line in the initialization.
+    as a single string, with the lines of the initialization separated by newlines.
 
     :param struct_type: The type of the C struct.
     :param struct_name: The name of the C struct variable.
@@ -112,22 +157,23 @@ def gen_struct_init(
         corresponding initialization value.
     :param is_const: A boolean indicating whether the struct should be declared as
         `const`. Defaults to False.
-    :return: A list of strings, each representing a C code line for the struct's
-        initialization.
+    :return: The C code of the struct's initialization.
+    :rtype: str
     """
-    c_code = []
     const = "const " if is_const else ""
 
-    c_code.append(f"{const}{struct_type} {struct_name} = {{")
-    for field in fields:
-        c_code.append(f"    .{field[0]} = {field[1]},")
-    c_code.append("};")
-    return c_code
+    return "\n".join(
+        [
+            f"{const}{struct_type} {struct_name} = {{",
+            *[f"    .{field[0]} = {field[1]}," for field in fields],
+            "};",
+        ]
+    )
 
 
 def gen_table(table_type: str, table_name: str, fields: list, is_const: bool = False):
     """
-    Generates the C code representation of a table as a list of strings.
+    Generates the C code representation of a table as a single string.
 
     The function constructs an array definition in C, including fields and
     their respective attributes. The table can optionally be declared as
@@ -143,57 +189,164 @@ def gen_table(table_type: str, table_name: str, fields: list, is_const: bool = F
         - Pointer or reference in C (string)
         - Flags or attributes (int)
     :param is_const: Whether the table should be declared as `const`. Default is False.
-    :return: List of strings representing the lines of the generated C code.
-    :rtype: list
+    :return: The lines of the generated C code, separated by newlines.
+    :rtype: str
     """
-    c_code = []
     const = "const" if is_const else ""
 
-    c_code.append(f"{const} {table_type} {table_name}[] = {{")
-    for field in fields:
-        c_code.append(
-            f'    {{ (uint8_t*)"{field[0]}", {field[1]}, {field[2]}, (void*) {field[3]}, (void*) {field[4]}, {field[5]} }},'
+    return "\n".join(
+        [
+            f"{const} {table_type} {table_name}[] = {{",
+            *[
+                f'    {{ (uint8_t*)"{field[0]}", {field[1]}, {field[2]}, (void*) {field[3]}, (void*) {field[4]}, {field[5]} }},'
+                for field in fields
+            ],
+            "};",
+        ]
+    )
+
+
+def get_usart_handler(
+    peripheral: dict, handlers_init: list, emitted_gpios: set | None = None
+):
+    """
+    Returns a string reference to the HAL handler of an USART peripheral.
+
+    :param peripheral: A dictionary containing details about the peripheral.
+    :param handlers_init: Unused, kept for a common signature with other peripherals.
+    :param emitted_gpios: Unused, kept for a common signature with other peripherals.
+    :return: A string reference to the UART handler.
+    :rtype: str
+    """
+    return f"&huart{peripheral['peripheral'].removeprefix(USART_DRIVER_NAME)}"
+
+
+def get_gpio_handler(
+    peripheral: dict, handlers_init: list, emitted_gpios: set | None = None
+):
+    """
+    Returns a string reference to the GPIO allocation structure of a GPIO peripheral,
+    and appends the initialization of this structure to `handlers_init`.
+
+    If `emitted_gpios` is provided, the structure is only appended the first time a
+    given port and pin are encountered, so that several peripherals sharing a GPIO
+    reference the same structure.
+
+    :param peripheral: A dictionary containing details about the peripheral. The
+        "peripheral" key must contain nested keys "port" and "pin".
+    :param handlers_init: A list to which the generated initialization structure
+        code will be appended.
+    :param emitted_gpios: Set of the GPIO structure names already appended to
+        `handlers_init`. Updated by this function.
+    :return: A string reference to the GPIO allocation structure.
+    :rtype: str
+    """
+    gpio = peripheral["peripheral"]
+    port, pin = gpio["port"], gpio["pin"]
+    gpio_strict_name = f"K_GPIO_P{port}{pin}"
+    if emitted_gpios is not None:
+        if gpio_strict_name in emitted_gpios:
+            return f"&{gpio_strict_name}"
+        emitted_gpios.add(gpio_strict_name)
+    handlers_init.append(
+        gen_struct_init(
+            "GPIO_ALLOC",
+            gpio_strict_name,
+            [
+                ["gpio", f"GPIO{port}"],
+                ["pin", f"GPIO_PIN_{pin}"],
+            ],
+            True,
         )
-    c_code.append("};")
-    return c_code
+    )
+    return f"&{gpio_strict_name}"
+
+
+def get_default_handler(
+    peripheral: dict, handlers_init: list, emitted_gpios: set | None = None
+):
+    """
+    Returns the handler reference of a peripheral without dedicated handler.
+
+    :param peripheral: A dictionary containing details about the peripheral.
+    :param handlers_init: Unused, kept for a common signature with other peripherals.
+    :param emitted_gpios: Unused, kept for a common signature with other peripherals.
+    :return: "0" if the peripheral is "None", otherwise an empty string.
+    :rtype: str
+    """
+    return "0" if peripheral["peripheral"] == "None" else ""
+
 
+PERIPHERAL_HANDLERS = {
+    USART_DRIVER_NAME: get_usart_handler,
+    GPIO_DRIVER_NAME: get_gpio_handler,
+}
 
-def get_peripheral_handler(peripheral, handlers_init: list):
+
+def get_peripheral_handler(
+    peripheral, handlers_init: list, emitted_gpios: set | None = None
+):
     """
     Returns a string reference to the peripheral handler or empty string based on the
     peripheral type. Updates the `handlers_init` list if the peripheral type is GPIO.
 
+    The handler is built by the function registered for the peripheral type in
+    `PERIPHERAL_HANDLERS`, or by `get_default_handler` for other types.
+
     :param peripheral: A dictionary containing details about the peripheral. Must
         include keys "type" and "peripheral". If "type" is "GPIO", "peripheral"
         must also contain nested keys "port" and "pin".
     :type peripheral: dict
-    :param handlers_init: A list to which generated initialization structures
-        for GPIO peripherals will be appended.
+    :param handlers_init: A list to which the generated initialization structure
+        code for GPIO peripherals will be appended.
     :type handlers_init: list
+    :param emitted_gpios: Optional set of the GPIO structure names already appended
+        to `handlers_init`, used to avoid duplicated GPIO structures.
+    :type emitted_gpios: set | None
     :return: A string reference to the peripheral handler or an empty string if
         the peripheral type is unsupported.
     :rtype: str
     """
-    if peripheral["type"] == USART_DRIVER_NAME:
-        return f"&huart{peripheral['peripheral'].removeprefix(USART_DRIVER_NAME)}"
-    elif peripheral["type"] == GPIO_DRIVER_NAME:
-        gpio_strict_name = f"K_GPIO_P{peripheral['peripheral']['port']}{peripheral['peripheral']['pin']}"
-        handlers_init.extend(
-            gen_struct_init(
-                "GPIO_ALLOC",
-                gpio_strict_name,
-                [
-                    ["gpio", f"GPIO{peripheral['peripheral']['port']}"],
-                    ["pin", f"GPIO_PIN_{peripheral['peripheral']['pin']}"],
-                ],
-                True,
-            )
-        )
-        return f"&{gpio_strict_name}"
-    elif peripheral["peripheral"] == "None":
-        return "0"
-    else:
-        return ""
+    return PERIPHERAL_HANDLERS.get(peripheral["type"], get_default_handler)(
+        peripheral, handlers_init, emitted_gpios
+    )
+
+
+def get_buffers_by_peripheral(buffers: list):
+    """
+    Indexes the buffers of the pre-analysis by peripheral name.
+
+    Buffer names are built as `BUFFER_NAME_PREFIX` + peripheral + `BUFFER_NAME_SUFFIX`
+    during the pre-analysis, so the peripheral name is recovered exactly.
+
+    :param buffers: List of buffers from the pre-analysis.
+    :return: Dictionary mapping each peripheral name to its buffer name.
+    :rtype: dict
+    """
+    return {
+        buffer["name"]
+        .removeprefix(BUFFER_NAME_PREFIX)
+        .removesuffix(BUFFER_NAME_SUFFIX): buffer["name"]
+        for buffer in buffers
+    }
+
+
+def get_peripheral_buffer(peripheral: dict, buffers_by_peripheral: dict):
+    """
+    Returns a string reference to the reception buffer of a peripheral.
+
+    :param peripheral: A dictionary containing details about the peripheral.
+    :param buffers_by_peripheral: Buffer names indexed by peripheral name, see
+        `get_buffers_by_peripheral`.
+    :return: A string reference to the buffer, or "0" if the peripheral has no buffer.
+    :rtype: str
+    """
+    if (
+        peripheral["type"] == USART_DRIVER_NAME
+        and peripheral["peripheral"] in buffers_by_peripheral
+    ):
+        return f"&{buffers_by_peripheral[peripheral['peripheral']]}"
+    return "0"
 
 
 def gen_drivers_alloc(peri_config: dict, analysis: dict):
@@ -211,41 +364,50 @@ def gen_drivers_alloc(peri_config: dict, analysis: dict):
         details required for proper driver initialization.
     :type peri_config: dict
 
-    :return: List containing strings of generated initialization C code for the
-        driver allocation process.
-    :rtype: list
+    :return: Generated initialization C code for the driver allocation process.
+    :rtype: str
     """
-    peri_list = []
     struct_init_c_code = []
+    emitted_gpios = set()
+    buffers_by_peripheral = get_buffers_by_peripheral(analysis["buffers"])
 
     # Parse config
-    for i, peripheral in enumerate(peri_config):
-        # Check if the peripheral needs a buffer
-        peri_buffer = "0"
-        for buffer in analysis["buffers"]:
-            if (
-                peripheral["type"] == "USART"
-                and peripheral["peripheral"] in buffer["name"]
-            ):
-                peri_buffer = f"&{buffer['name']}"
-
-        # Generate peripherals dictionary
-        peri_fields = [
+    peri_list = [
+        [
             peripheral["name"],
             peripheral["type"],
             peripheral["direction"],
-            get_peripheral_handler(peripheral, struct_init_c_code),
-            peri_buffer,
+            get_peripheral_handler(peripheral, struct_init_c_code, emitted_gpios),
+            get_peripheral_buffer(peripheral, buffers_by_peripheral),
             i,
         ]
-        peri_list.append(peri_fields)
+        for i, peripheral in enumerate(peri_config)
+    ]
 
     # Generate configuration table
-    struct_init_c_code.extend(
+    struct_init_c_code.append(
         gen_table(DRIVER_ALLOC_TYPE, DRIVER_ALLOC_TABLE_NAME, peri_list, True)
     )
 
-    return struct_init_c_code
+    return "\n".join(struct_init_c_code)
+
+
+def get_init_by_driver(config: dict):
+    """
+    Indexes the initialization sequences of the configuration by driver type.
+
+    If several sequences are defined for the same driver type, the first one is kept.
+
+    :param config: Dictionary containing the configuration, with the key
+        'init_sequence'.
+    :type config: dict
+    :return: Dictionary mapping each driver type to its initialization sequence entry.
+    :rtype: dict
+    """
+    init_by_driver = {}
+    for init in config["init_sequence"]:
+        init_by_driver.setdefault(init["driver"], init)
+    return init_by_driver
 
 
 def gen_init_func(config: dict, analysis: dict):
@@ -268,41 +430,41 @@ def gen_init_func(config: dict, analysis: dict):
     func_code = ["void drivers_init()"]
     func_code.extend("{")
 
+    seq_by_driver = get_init_by_driver(config)
+    # Placeholders values of each USART driver, computed once for all sequences
+    usart_drivers = [
+        (
+            drv["peripheral"],
+            get_peripheral_handler(drv, []),
+            f"{BUFFER_NAME_PREFIX}{drv['peripheral']}{BUFFER_NAME_SUFFIX}",
+        )
+        for drv in config["drivers"]
+        if drv["type"] == USART_DRIVER_NAME
+    ]
+
     for driver_init in analysis["init_list"]:
         # Get init sequence from config
         init_sequence = None
         init_sequence_it = None
-        for seq in config["init_sequence"]:
-            if seq["driver"] == driver_init:
-                init_sequence = seq["sequence"]
-                init_sequence_it = (
-                    seq["it_enabled_sequence"] if "it_enabled_sequence" in seq else None
-                )
-                break
+        seq = seq_by_driver.get(driver_init)
+        if seq is not None:
+            init_sequence = seq["sequence"]
+            init_sequence_it = seq.get("it_enabled_sequence")
 
         for sequence in [init_sequence, init_sequence_it]:
             if sequence is not None:
                 # Perform driver-specific actions
                 if driver_init == USART_DRIVER_NAME:
-                    for driver_to_init in config["drivers"]:
-                        if driver_to_init["type"] == USART_DRIVER_NAME:
-                            func_code.append(
-                                f"    // {driver_to_init['peripheral']} initialization"
+                    for drv_name, handler, buffer in usart_drivers:
+                        func_code.append(f"    // {drv_name} initialization")
+                        for init_call in sequence:
+                            init_call = (
+                                init_call.replace("<drv_name>", drv_name)
+                                .replace("<handler>", handler)
+                                .replace("<buffer>", buffer)
                             )
-                            for init_call in sequence:
-                                init_call = init_call.replace(
-                                    "<drv_name>", driver_to_init["peripheral"]
-                                )
-                                init_call = init_call.replace(
-                                    "<handler>",
-                                    get_peripheral_handler(driver_to_init, []),
-                                )
-                                init_call = init_call.replace(
-                                    "<buffer>",
-                                    f"G_{driver_to_init['peripheral']}{BUFFER_NAME_SUFFIX}",
-                                )
-                                func_code.append(f"    {init_call}")
-                            func_code.append("")
+                            func_code.append(f"    {init_call}")
+                        func_code.append("")
 
                 else:
                     func_code.append(f"    // {driver_init} initialization")
@@ -350,6 +512,288 @@ def gen_handlers_func(config: dict):
     return func_code
 
 
+def get_file_info(config: dict, header: bool):
+    """
+    Computes the values depending only on the generated C file.
+
+    These values are constant for a whole file generation, so they are computed
+    once before processing the template instead of at each marker.
+
+    :param config: Dictionary containing configuration data.
+    :param header: Boolean indicating whether the file is a header (.h) or a
+                   source file (.c).
+    :return: Dictionary with the keys 'filename', 'guard' (include guard macro),
+        'date' and 'author'.
+    :rtype: dict
+    """
+    file_ext = ".h" if header else ".c"
+    name = config["target_c_file"]["name"]
+    return {
+        "filename": name + file_ext,
+        "guard": f"{name.upper()}_{file_ext[1:].upper()}",
+        "date": datetime.now().strftime("%d-%m-%Y"),
+        "author": "Auto-generated by " + Path(__file__).stem,
+    }
+
+
+def write_code(buf: io.StringIO, code: str):
+    """
+    Writes a block of generated code into a buffer, terminated by a newline.
+
+    Nothing is written if the block is empty.
+
+    :param buf: Buffer receiving the generated code.
+    :param code: Generated code, without trailing newline.
+    :return: None
+    """
+    if code:
+        buf.write(code)
+        buf.write("\n")
+
+
+def gen_filename_marker(
+    buf: io.StringIO, line: str, config: dict, analysis: dict, file_info: dict
+):
+    """
+    Replaces the filename marker by the name of the generated file.
+
+    :param buf: Buffer receiving the generated code.
+    :param line: Template line containing the marker.
+    :param config: Dictionary containing configuration data.
+    :param analysis: Pre-analysis result.
+    :param file_info: Values of the generated file, see `get_file_info`.
+    :return: None
+    """
+    buf.write(line.replace(MARKER + FILENAME_MARKER, file_info["filename"]) + "\n")
+
+
+def gen_date_marker(
+    buf: io.StringIO, line: str, config: dict, analysis: dict, file_info: dict
+):
+    """
+    Replaces the date marker by the current date.
+
+    :param buf: Buffer receiving the generated code.
+    :param line: Template line containing the marker.
+    :param config: Dictionary containing configuration data.
+    :param analysis: Pre-analysis result.
+    :param file_info: Values of the generated file, see `get_file_info`.
+    :return: None
+    """
+    buf.write(line.replace(MARKER + DATE_MARKER, file_info["date"]) + "\n")
+
+
+def gen_author_marker(
+    buf: io.StringIO, line: str, config: dict, analysis: dict, file_info: dict
+):
+    """
+    Replaces the author marker by the name of this generator.
+
+    :param buf: Buffer receiving the generated code.
+    :param line: Template line containing the marker.
+    :param config: Dictionary containing configuration data.
+    :param analysis: Pre-analysis result.
+    :param file_info: Values of the generated file, see `get_file_info`.
+    :return: None
+    """
+    buf.write(line.replace(MARKER + AUTHOR_MARKER, file_info["author"]) + "\n")
+
+
+def gen_source_include_marker(
+    buf: io.StringIO, line: str, config: dict, analysis: dict, file_info: dict
+):
+    """
+    Generates the include directives of the source file, each file being
+    included only once.
+
+    :param buf: Buffer receiving the generated code.
+    :param line: Template line containing the marker.
+    :param config: Dictionary containing configuration data.
+    :param analysis: Pre-analysis result.
+    :param file_info: Values of the generated file, see `get_file_info`.
+    :return: None
+    """
+    # Do not extend the configuration list, it is shared by all generations
+    includes_list = dict.fromkeys([*config["includes_c"], *analysis["includes_c"]])
+    write_code(buf, gen_includes(includes_list))
+
+
+def gen_header_include_marker(
+    buf: io.StringIO, line: str, config: dict, analysis: dict, file_info: dict
+):
+    """
+    Generates the include directives of the header file.
+
+    :param buf: Buffer receiving the generated code.
+    :param line: Template line containing the marker.
+    :param config: Dictionary containing configuration data.
+    :param analysis: Pre-analysis result.
+    :param file_info: Values of the generated file, see `get_file_info`.
+    :return: None
+    """
+    write_code(buf, gen_includes(config["includes_h"]))
+
+
+def gen_source_constants_marker(
+    buf: io.StringIO, line: str, config: dict, analysis: dict, file_info: dict
+):
+    """
+    Generates the constants of the source file: buffers and drivers allocation table.
+
+    :param buf: Buffer receiving the generated code.
+    :param line: Template line containing the marker.
+    :param config: Dictionary containing configuration data.
+    :param analysis: Pre-analysis result.
+    :param file_info: Values of the generated file, see `get_file_info`.
+    :return: None
+    """
+    # Generate buffers declaration
+    write_code(
+        buf,
+        "\n".join(
+            [
+                f"uint8_t {buffer['name']}_BUF[{buffer['size']}];\n"
+                + gen_struct_init(
+                    "RX_BUFFER",
+                    buffer["name"],
+                    [
+                        ["buffer", f"{buffer['name']}_BUF"],
+                        ["size", "0"],
+                    ],
+                    False,
+                )
+                for buffer in analysis["buffers"]
+            ]
+        ),
+    )
+
+    write_code(buf, gen_drivers_alloc(config["drivers"], analysis))
+
+
+def gen_header_constants_marker(
+    buf: io.StringIO, line: str, config: dict, analysis: dict, file_info: dict
+):
+    """
+    Generates the constants of the header file: drivers allocation table and
+    buffers declarations.
+
+    :param buf: Buffer receiving the generated code.
+    :param line: Template line containing the marker.
+    :param config: Dictionary containing configuration data.
+    :param analysis: Pre-analysis result.
+    :param file_info: Values of the generated file, see `get_file_info`.
+    :return: None
+    """
+    write_code(
+        buf,
+        "\n".join(
+            [
+                f"extern const {DRIVER_ALLOC_TYPE} {DRIVER_ALLOC_TABLE_NAME}[];",
+                *[
+                    f"extern RX_BUFFER {buffer['name']};"
+                    for buffer in analysis["buffers"]
+                ],
+            ]
+        ),
+    )
+
+
+def gen_ifndef_marker(
+    buf: io.StringIO, line: str, config: dict, analysis: dict, file_info: dict
+):
+    """
+    Generates the include guard of the file.
+
+    :param buf: Buffer receiving the generated code.
+    :param line: Template line containing the marker.
+    :param config: Dictionary containing configuration data.
+    :param analysis: Pre-analysis result.
+    :param file_info: Values of the generated file, see `get_file_info`.
+    :return: None
+    """
+    buf.write(f"#ifndef {file_info['guard']}\n#define {file_info['guard']}\n")
+
+
+def gen_define_marker(
+    buf: io.StringIO, line: str, config: dict, analysis: dict, file_info: dict
+):
+    """
+    Generates the exported defines: table size, drivers activation and buffer sizes.
+
+    :param buf: Buffer receiving the generated code.
+    :param line: Template line containing the marker.
+    :param config: Dictionary containing configuration data.
+    :param analysis: Pre-analysis result.
+    :param file_info: Values of the generated file, see `get_file_info`.
+    :return: None
+    """
+    write_code(
+        buf,
+        gen_defines(
+            [
+                [
+                    "K_DRIVERS_ALLOC_SIZE",
+                    str(len(config["drivers"])),
+                ]
+            ]
+        ),
+    )
+    write_code(buf, "\n".join([f"#define {act}" for act in analysis["activations"]]))
+    write_code(buf, gen_defines(list(analysis["buffers_size"].items())))
+
+
+def gen_source_functions_marker(
+    buf: io.StringIO, line: str, config: dict, analysis: dict, file_info: dict
+):
+    """
+    Generates the functions of the source file.
+
+    :param buf: Buffer receiving the generated code.
+    :param line: Template line containing the marker.
+    :param config: Dictionary containing configuration data.
+    :param analysis: Pre-analysis result.
+    :param file_info: Values of the generated file, see `get_file_info`.
+    :return: None
+    """
+    write_code(buf, "\n".join(gen_init_func(config, analysis)))
+    write_code(buf, "\n".join(gen_handlers_func(config)))
+
+
+def gen_header_functions_marker(
+    buf: io.StringIO, line: str, config: dict, analysis: dict, file_info: dict
+):
+    """
+    Generates the functions prototypes of the header file.
+
+    :param buf: Buffer receiving the generated code.
+    :param line: Template line containing the marker.
+    :param config: Dictionary containing configuration data.
+    :param analysis: Pre-analysis result.
+    :param file_info: Values of the generated file, see `get_file_info`.
+    :return: None
+    """
+    buf.write("void drivers_init();\n")
+
+
+SOURCE_MARKER_HANDLERS = {
+    FILENAME_MARKER: gen_filename_marker,
+    DATE_MARKER: gen_date_marker,
+    AUTHOR_MARKER: gen_author_marker,
+    INCLUDE_MARKER: gen_source_include_marker,
+    CONST_MARKER: gen_source_constants_marker,
+    IFNDEF_MARKER: gen_ifndef_marker,
+    DEFINE_MARKER: gen_define_marker,
+    FUNCTIONS_MARKER: gen_source_functions_marker,
+}
+
+HEADER_MARKER_HANDLERS = {
+    **SOURCE_MARKER_HANDLERS,
+    INCLUDE_MARKER: gen_header_include_marker,
+    CONST_MARKER: gen_header_constants_marker,
+    FUNCTIONS_MARKER: gen_header_functions_marker,
+}
+
+
 def gen_c_code(template: str, config: dict, analysis: dict, header: bool = False):
     """
     Generate source or header file based on a template and configuration parameters.
@@ -357,9 +801,11 @@ def gen_c_code(template: str, config: dict, analysis: dict, header: bool = False
     This function processes a provided template file, replacing specific markers within
     the template with data from the configuration dictionary or analysis results. The
     output file may be generated as either a header or source file, depending on the
-    value of the `header` parameter. The function ensures that appropriate includes,
-    constants, and other data are added dynamically according to markers within the
-    template.
+    value of the `header` parameter. The template is parsed once by
+    `parse_template` and each marker is expanded by its handler from
+    `HEADER_MARKER_HANDLERS` or `SOURCE_MARKER_HANDLERS`, selected once for the
+    whole file. The generated code is accumulated in a memory buffer and
+    written to the target file at once.
 
     :param template: Path to the template file.
     :param config: Dictionary containing configuration data such as target file
@@ -370,129 +816,47 @@ def gen_c_code(template: str, config: dict, analysis: dict, header: bool = False
                    source file (.c). Defaults to False for source file generation.
     :return: None
     """
-    # Load template file
-    template_lines = open(template).readlines()
+    buf = io.StringIO()
 
-    generated_lines = []
-
-    file_ext = ".h" if header else ".c"
+    file_info = get_file_info(config, header)
+    out_dir = Path(config["target_c_file"]["directory"]) / ("Inc" if header else "Src")
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out_path = out_dir / file_info["filename"]
+    marker_handlers = HEADER_MARKER_HANDLERS if header else SOURCE_MARKER_HANDLERS
 
     # Replace markers by the new data
-    for line in template_lines:
-        markers = extract_marker(line)
+    for line, markers in parse_template(template):
         if markers is None:
-            generated_lines.append(line)
+            buf.write(line + "\n")
         else:
             for marker in markers:
-                if marker == FILENAME_MARKER:
-                    generated_lines.append(
-                        line.replace(
-                            MARKER + marker, config["target_c_file"]["name"] + file_ext
-                        )
-                    )
-                elif marker == DATE_MARKER:
-                    generated_lines.append(
-                        line.replace(
-                            MARKER + marker, datetime.now().strftime("%d-%m-%Y")
-                        )
-                    )
-                elif marker == AUTHOR_MARKER:
-                    generated_lines.append(
-                        line.replace(
-                            MARKER + marker,
-                            "Auto-generated by "
-                            + os.path.splitext(os.path.basename(__file__))[0],
-                        )
-                    )
-                elif marker == INCLUDE_MARKER:
-                    if header:
-                        generated_lines.extend(gen_includes(config["includes_h"]))
-                    else:
-                        includes_list = config["includes_c"]
-                        includes_list.extend(analysis["includes_c"])
-                        generated_lines.extend(gen_includes(includes_list))
-                elif marker == CONST_MARKER:
-                    if header:
-                        generated_lines.append(
-                            f"extern const {DRIVER_ALLOC_TYPE} {DRIVER_ALLOC_TABLE_NAME}[];"
-                        )
-
-                        # Generate buffers declaration
-                        for buffer in analysis["buffers"]:
-                            generated_lines.append(
-                                f"extern RX_BUFFER {buffer['name']};"
-                            )
-                    else:
-                        # Generate buffers declaration
-                        for buffer in analysis["buffers"]:
-                            generated_lines.append(
-                                f"uint8_t {buffer['name']}_BUF[{buffer['size']}];"
-                            )
-                            generated_lines.extend(
-                                gen_struct_init(
-                                    "RX_BUFFER",
-                                    buffer["name"],
-                                    [
-                                        ["buffer", f"{buffer['name']}_BUF"],
-                                        ["size", "0"],
-                                    ],
-                                    False,
-                                )
-                            )
-
-                        generated_lines.extend(
-                            gen_drivers_alloc(config["drivers"], analysis)
-                        )
-
-                elif marker == IFNDEF_MARKER:
-                    generated_lines.append(
-                        f"#ifndef {config['target_c_file']['name'].upper()}_{file_ext.removeprefix('.').upper()}"
-                    )
-                    generated_lines.append(
-                        f"#define {config['target_c_file']['name'].upper()}_{file_ext.removeprefix('.').upper()}"
-                    )
-                elif marker == DEFINE_MARKER:
-                    generated_lines.extend(
-                        gen_defines(
-                            [
-                                [
-                                    "K_DRIVERS_ALLOC_SIZE",
-                                    str(len(config["drivers"])),
-                                ]
-                            ]
-                        )
-                    )
-                    for act in analysis["activations"]:
-                        generated_lines.append(f"#define {act}")
-                    for buffer_size in analysis["buffers_size"]:
-                        generated_lines.append(
-                            f"#define {buffer_size} {analysis['buffers_size'][buffer_size]}"
-                        )
-                elif marker == FUNCTIONS_MARKER:
-                    if header:
-                        generated_lines.append("void drivers_init();")
-                    else:
-                        generated_lines.extend(gen_init_func(config, analysis))
-                        generated_lines.extend(gen_handlers_func(config))
-                else:
+                handler = marker_handlers.get(marker)
+                if handler is None:
                     print(f"Unknown marker: {MARKER}{marker}")
+                else:
+                    handler(buf, line, config, analysis, file_info)
 
     # Write the target file
-    with open(
-        os.path.join(
-            config["target_c_file"]["directory"],
-            "Inc" if header else "Src",
-            config["target_c_file"]["name"] + file_ext,
-        ),
-        "w",
-    ) as f:
-        f.writelines(
-            [
-                line + "\n" if not line.endswith("\n") else line
-                for line in generated_lines
-            ]
-        )
-    print(f"File {config['target_c_file']['name']}{file_ext} generated")
+    out_path.write_text(buf.getvalue())
+    print(f"File {file_info['filename']} generated")
+
+
+def gen_c_files(config: dict, analysis: dict):
+    """
+    Generates both the C source and header files from the same configuration and
+    pre-analysis.
+
+    The source file is generated first, then the header file. Each generation
+    selects its marker handlers table once, see `gen_c_code`.
+
+    :param config: Dictionary containing configuration data.
+    :param analysis: Pre-analysis result, see `pre_analyze`.
+    :return: None
+    """
+    templates_dir = Path(__file__).resolve().parent
+
+    gen_c_code(str(templates_dir / C_TEMPLATE_FILE), config, analysis)
+    gen_c_code(str(templates_dir / H_TEMPLATE_FILE), config, analysis, True)
 
 
 def gen_rust_code(config: dict):
@@ -553,104 +917,110 @@ def gen_rust_code(config: dict):
             generated_lines.append("}")
 
     # Write the target file
-    with open(
-        os.path.join(
-            config["target_rust_file"]["directory"],
-            config["target_rust_file"]["name"] + file_ext,
-        ),
-        "w",
-    ) as f:
-        f.writelines(
-            [
-                line + "\n" if not line.endswith("\n") else line
-                for line in generated_lines
-            ]
-        )
+    out_path = Path(config["target_rust_file"]["directory"]) / (
+        config["target_rust_file"]["name"] + file_ext
+    )
+    out_path.write_text("\n".join(generated_lines) + "\n")
     print(f"File {config['target_rust_file']['name']}{file_ext} generated")
 
 
-#################
-# Script begins #
-#################
-if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python gen_drivers_alloc.py <input_file>")
-        exit(1)
+def pre_analyze(config: dict):
+    """
+    Analyzes the configuration before code generation.
 
-    # Load YAML configuration file
-    input_file = sys.argv[1]
-    gen_config = yaml.load(open(input_file), Loader=yaml.FullLoader)
+    This function collects the includes, drivers activations, drivers to initialize,
+    buffers and buffer sizes needed by the configured drivers. Ordered dictionaries
+    are used as sets while collecting, so membership checks are constant time and
+    the first-seen order of the elements is kept.
 
-    print("Generating drivers allocation...")
+    :param config: Dictionary containing the drivers and initialization sequences.
+    :type config: dict
+    :return: Dictionary with the keys 'includes_c', 'activations', 'init_list',
+        'buffers' and 'buffers_size'.
+    :rtype: dict
+    """
+    includes_c = {}
+    activations = {}
+    init_list = {}
+    buffers = []
+    buffers_size = {}
 
-    # Pre-analysis
-    pre_analysis = {
-        "includes_c": [],
-        "activations": [],
-        "init_list": [],
-        "buffers": [],
-        "buffers_size": {},
-    }
+    init_by_driver_type = get_init_by_driver(config)
+
+    for driver in config["drivers"]:
+        init = init_by_driver_type.get(driver["type"])
 
-    for driver in gen_config["drivers"]:
         # Add specific includes for drivers
-        if (
-            driver["type"] == USART_DRIVER_NAME
-            and "usart.h" not in pre_analysis["includes_c"]
-        ):
-            pre_analysis["includes_c"].append("usart.h")
+        if driver["type"] == USART_DRIVER_NAME:
+            includes_c["usart.h"] = None
         # Add activation for each driver
-        activation = f"K_DRIVER_ACTIVATE_{driver['type']}"
-        if activation not in pre_analysis["activations"]:
-            pre_analysis["activations"].append(activation)
+        activations[f"K_DRIVER_ACTIVATE_{driver['type']}"] = None
         # Add driver init list
-        if driver["type"] not in pre_analysis["init_list"]:
-            pre_analysis["init_list"].append(driver["type"])
+        if driver["type"] not in init_list:
+            init_list[driver["type"]] = None
 
             # Add init includes and buffers in the list
-            for init in gen_config["init_sequence"]:
-                if init["driver"] == driver["type"]:
-                    for include in init["includes"]:
-                        if include not in pre_analysis["includes_c"]:
-                            pre_analysis["includes_c"].append(include)
+            if init is not None:
+                includes_c.update(dict.fromkeys(init["includes"]))
 
         # Add driver buffer
-        for init in gen_config["init_sequence"]:
-            if (
-                init["driver"] == driver["type"]
-                and "it_enabled" in driver
-                and driver["it_enabled"]
-            ):
-                pre_analysis["buffers"].append(
-                    {
-                        "name": "G_" + driver["peripheral"] + BUFFER_NAME_SUFFIX,
-                        "size": "K_" + init["driver"] + BUFFER_SIZE_SUFFIX,
-                    }
-                )
-                if (
-                    "K_" + init["driver"] + BUFFER_SIZE_SUFFIX
-                    not in pre_analysis["buffers_size"]
-                ):
-                    pre_analysis["buffers_size"][
-                        "K_" + init["driver"] + BUFFER_SIZE_SUFFIX
-                    ] = init["buffer_size"]
-
-    # Generate C file
-    gen_c_code(
-        os.path.join(Path(__file__).resolve().parent, C_TEMPLATE_FILE),
-        gen_config,
-        pre_analysis,
-    )
+        if init is not None and "it_enabled" in driver and driver["it_enabled"]:
+            buffer_size = "K_" + init["driver"] + BUFFER_SIZE_SUFFIX
+            buffers.append(
+                {
+                    "name": BUFFER_NAME_PREFIX
+                    + driver["peripheral"]
+                    + BUFFER_NAME_SUFFIX,
+                    "size": buffer_size,
+                }
+            )
+            if buffer_size not in buffers_size:
+                buffers_size[buffer_size] = init["buffer_size"]
+
+    return {
+        "includes_c": list(includes_c),
+        "activations": list(activations),
+        "init_list": list(init_list),
+        "buffers": buffers,
+        "buffers_size": buffers_size,
+    }
 
-    # Generate H file
-    gen_c_code(
-        os.path.join(Path(__file__).resolve().parent, H_TEMPLATE_FILE),
-        gen_config,
-        pre_analysis,
-        True,
-    )
+
+def main():
+    """
+    Entry point of the generator.
+
+    Loads the YAML configuration file given on the command line, pre-analyzes it
+    and generates the C source and header files and the Rust bindings.
+
+    :return: Exit code of the script.
+    :rtype: int
+    """
+    if len(sys.argv) != 2:
+        print("Usage: python gen_drivers_alloc.py <input_file>")
+        return 1
+
+    # Load YAML configuration file
+    input_file = sys.argv[1]
+    with open(input_file, "rb") as f:
+        gen_config = yaml.load(f, Loader=YamlLoader)
+
+    print("Generating drivers allocation...")
+
+    # Pre-analysis
+    pre_analysis = pre_analyze(gen_config)
+
+    # Generate C and H files
+    gen_c_files(gen_config, pre_analysis)
 
     # Generate Rust file
     gen_rust_code(gen_config)
 
-    exit(0)
+    return 0
+
+
+#################
+# Script begins #
+#################
+if __name__ == "__main__":
+    sys.exit(main())